@@ -6,44 +6,48 @@ Usage:
     python create-data-url.py audio.wav
     python create-data-url.py audio.wav --overlays pitch,formants,hnr
     python create-data-url.py audio.wav --overlays all --viewer-url https://mysite.com/viewer.html
+    python create-data-url.py --batch files.tsv --overlays all
+
+--batch reads a tab-separated list of files ("-" for stdin), one per line as
+    audio_path[<TAB>overlays[<TAB>viewer_url]]
+and prints one iframe per file, separated by "<!--SEP-->" lines, all from a
+single Python process. Empty columns use the command-line options or their
+defaults.
 
 IMPORTANT: To view the generated HTML locally, you must serve it over HTTP:
     python -m http.server 8000
     # Or use: python scripts/serve-quarto.py
 
 Browsers block file:// iframes for security, so double-clicking the HTML won't work.
-"""
 
-import base64
-import sys
-from urllib.parse import quote
-from pathlib import Path
+Audio larger than 256KB is not put in the iframe URL when the viewer is served
+from the same site (relative --viewer-url): the iframe instead decodes the
+base64 in a small script and passes the viewer a blob: URL, which avoids the
+percent-encoded copy of the audio in the HTML and browser URL length limits.
 
-def create_embedded_viewer(audio_path, overlays="pitch,formants", viewer_url="./ozen-web/viewer.html"):
-    """Create self-contained iframe HTML with embedded audio."""
-    audio_file = Path(audio_path)
+Optional: if pybase64 is installed (pip install pybase64), its SIMD-accelerated
+encoder is used instead of the standard library's binascii encoder.
+"""
 
-    if not audio_file.exists():
-        raise FileNotFoundError(f"Audio file not found: {audio_path}")
+import sys
 
-    # Check file size
-    size_mb = audio_file.stat().st_size / (1024 * 1024)
-    if size_mb > 1.5:
-        print(f"Warning: File is {size_mb:.1f}MB. Data URLs are limited to ~1.5MB.", file=sys.stderr)
-        print("Consider using a remote URL instead.", file=sys.stderr)
+# Chunk size for streaming the encode; a multiple of 3 so no base64 padding
+# appears mid-stream and the chunks can be concatenated as-is.
+CHUNK_SIZE = 48 * 1024
 
-    # Read and encode
-    with open(audio_file, 'rb') as f:
-        audio_data = f.read()
+# Optional command-line flags: flag -> (keyword argument, converter)
+OPTIONS = {
+    "--overlays": ("overlays", str),
+    "--viewer-url": ("viewer_url", str),
+}
 
-    b64 = base64.b64encode(audio_data).decode('ascii')
-    data_url = f"data:audio/wav;base64,{b64}"
+# Separates the iframes printed in --batch mode
+BATCH_SEPARATOR = "\n<!--SEP-->\n"
 
-    # URL encode
-    encoded = quote(data_url, safe='')
+# "data:audio/wav;base64," percent-encoded, as it appears in the iframe src
+DATA_URL_PREFIX = b"data%3Aaudio%2Fwav%3Bbase64%2C"
 
-    # Create iframe
-    iframe = f'''<iframe
+IFRAME_TEMPLATE = '''<iframe
   src="{viewer_url}?audio={encoded}&overlays={overlays}"
   width="100%"
   height="600"
@@ -51,32 +55,160 @@ def create_embedded_viewer(audio_path, overlays="pitch,formants", viewer_url="./
   style="border: 1px solid #ddd; border-radius: 4px;">
 </iframe>'''
 
-    return iframe
+# Above this size (bytes of audio) a blob: URL is handed to the viewer instead
+# of a data URL, see blob_iframe()
+BLOB_THRESHOLD = 256 * 1024
+
+# Runs inside the iframe's srcdoc: decode the embedded base64, register the
+# blob with the parent page (so it outlives this document) and load the viewer
+BLOB_LOADER_SCRIPT = (
+    "<script>"
+    "fetch('data:audio/wav;base64,{b64}')"
+    ".then(r => r.blob())"
+    ".then(b => location.replace({viewer_url} + '?audio='"
+    " + encodeURIComponent(parent.URL.createObjectURL(b)) + '&overlays=' + {overlays}));"
+    "</script>"
+)
+
+BLOB_IFRAME_TEMPLATE = '''<iframe
+  srcdoc="{srcdoc}"
+  width="100%"
+  height="600"
+  frameborder="0"
+  style="border: 1px solid #ddd; border-radius: 4px;">
+</iframe>'''
+
+def is_same_origin(viewer_url):
+    """Whether viewer_url is relative, i.e. served from the same site as the page."""
+    return "://" not in viewer_url and not viewer_url.startswith("//")
+
+def blob_iframe(b64, viewer_url, overlays):
+    """
+    Create iframe HTML that loads the viewer with a blob: URL for the audio.
+
+    blob: URLs can only be fetched from the page's own origin, so this only
+    works for viewers on the same site (see is_same_origin).
+    """
+    import html
+    import json
+
+    head, tail = BLOB_LOADER_SCRIPT.split("{b64}")
+    tail = tail.format(viewer_url=json.dumps(viewer_url), overlays=json.dumps(overlays))
+
+    # Base64 never needs HTML escaping, so only the script around it is escaped
+    # and the payload is decoded from bytes exactly once
+    srcdoc = html.escape(head) + b64.decode('ascii') + html.escape(tail)
+    return BLOB_IFRAME_TEMPLATE.format(srcdoc=srcdoc)
+
+def url_encode_base64(b64):
+    """Percent-encode base64 bytes; only '+', '/' and '=' need escaping."""
+    return b64.replace(b"+", b"%2B").replace(b"/", b"%2F").replace(b"=", b"%3D")
+
+def create_embedded_viewer(audio_path, overlays="pitch,formants", viewer_url="./ozen-web/viewer.html"):
+    """Create self-contained iframe HTML with embedded audio."""
+    # Imported here so the usage/error path doesn't pay for them
+    import mmap
+    import os
+    import stat
+    try:
+        from pybase64 import b64encode
+    except ImportError:
+        # Call binascii directly rather than through base64.b64encode's wrapper
+        from binascii import b2a_base64
+        from functools import partial
+        b64encode = partial(b2a_base64, newline=False)
+
+    # A single stat() checks that the file exists and gets its size and type
+    try:
+        st = os.stat(audio_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Audio file not found: {audio_path}") from None
+
+    # Check file size
+    size = st.st_size
+    size_mb = size / (1024 * 1024)
+    use_blob = size > BLOB_THRESHOLD and is_same_origin(viewer_url)
+    if size_mb > 1.5 and not use_blob:
+        print(f"Warning: File is {size_mb:.1f}MB. Data URLs are limited to ~1.5MB.", file=sys.stderr)
+        print("Consider using a remote URL instead.", file=sys.stderr)
+
+    # Base64 encode and URL encode in chunks so only one chunk of the
+    # intermediate representations is held in memory at a time. Regular files
+    # are memory-mapped so chunks are encoded straight from the page cache
+    # without being copied into a read buffer. Pipes, /dev/stdin and process
+    # substitution report a size of 0 and can't be mapped (nor can empty
+    # files), so those are read until EOF into a reused buffer instead.
+    # The blob: loader needs plain base64.
+    encoded = bytearray() if use_blob else bytearray(DATA_URL_PREFIX)
+    with open(audio_path, 'rb') as f:
+        if stat.S_ISREG(st.st_mode) and size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                for start in range(0, len(view), CHUNK_SIZE):
+                    b64 = b64encode(view[start:start + CHUNK_SIZE])
+                    encoded += b64 if use_blob else url_encode_base64(b64)
+        else:
+            buf = bytearray(CHUNK_SIZE)
+            view = memoryview(buf)
+            while n := f.readinto(buf):
+                b64 = b64encode(view[:n])
+                encoded += b64 if use_blob else url_encode_base64(b64)
+
+    # Create iframe
+    if use_blob:
+        return blob_iframe(encoded, viewer_url, overlays)
+    return IFRAME_TEMPLATE.format(viewer_url=viewer_url, encoded=encoded.decode('ascii'), overlays=overlays)
+
+def create_batch(list_path, **defaults):
+    """Create iframe HTML for every audio file in a tab-separated list ("-" for stdin)."""
+    if list_path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(list_path) as f:
+            lines = f.read().splitlines()
+
+    iframes = []
+    for line in lines:
+        audio_path, *columns = line.split("\t")
+        if not audio_path.strip():
+            continue
+
+        # Columns follow the order of OPTIONS
+        options = dict(defaults)
+        for (name, convert), value in zip(OPTIONS.values(), columns):
+            if value:
+                options[name] = convert(value)
+        iframes.append(create_embedded_viewer(audio_path, **options))
+
+    return BATCH_SEPARATOR.join(iframes)
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python create-data-url.py <audio-file> [--overlays pitch,formants] [--viewer-url ./ozen-web/viewer.html]")
+        print("       python create-data-url.py --batch <file-list> [--overlays pitch,formants] [--viewer-url ./ozen-web/viewer.html]")
         sys.exit(1)
 
-    audio_path = sys.argv[1]
-    overlays = "pitch,formants"
-    viewer_url = "viewer.html"
+    batch = sys.argv[1] == "--batch"
+    if batch and len(sys.argv) < 3:
+        print("--batch requires a file list", file=sys.stderr)
+        sys.exit(1)
+
+    options = {"overlays": "pitch,formants", "viewer_url": "viewer.html"}
 
     # Parse optional arguments
-    i = 2
-    while i < len(sys.argv):
-        if sys.argv[i] == "--overlays" and i + 1 < len(sys.argv):
-            overlays = sys.argv[i + 1]
-            i += 2
-        elif sys.argv[i] == "--viewer-url" and i + 1 < len(sys.argv):
-            viewer_url = sys.argv[i + 1]
-            i += 2
-        else:
-            print(f"Unknown argument: {sys.argv[i]}", file=sys.stderr)
+    args = iter(sys.argv[3:] if batch else sys.argv[2:])
+    for arg in args:
+        name, convert = OPTIONS.get(arg, (None, None))
+        value = next(args, None)
+        if name is None or value is None:
+            print(f"Unknown argument: {arg}", file=sys.stderr)
             sys.exit(1)
+        options[name] = convert(value)
 
     try:
-        html = create_embedded_viewer(audio_path, overlays, viewer_url)
+        if batch:
+            html = create_batch(sys.argv[2], **options)
+        else:
+            html = create_embedded_viewer(sys.argv[1], **options)
         print(html)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
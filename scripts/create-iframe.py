@@ -8,9 +8,16 @@ Usage:
     python create-iframe.py samples/audio.wav --viewer-url ./ozen-web/viewer.html
     python create-iframe.py audio.wav --overlays pitch,formants --height 800
     python create-iframe.py audio.wav --overlays pitch,formants --height 80%
+    python create-iframe.py --batch files.tsv --height 400
 
 The script calculates the correct relative path from the viewer to the audio file.
 
+--batch reads a tab-separated list of files ("-" for stdin), one per line as
+    audio_path[<TAB>overlays[<TAB>viewer_url[<TAB>height]]]
+and prints one iframe per file, separated by "<!--SEP-->" lines, all from a
+single Python process. Empty columns use the command-line options or their
+defaults.
+
 IMPORTANT: To view the generated HTML, serve it over HTTP:
     python -m http.server 8000
     # Or use: python scripts/serve-quarto.py
@@ -19,8 +26,33 @@ Browsers block file:// iframes for security.
 """
 
 import sys
-from pathlib import Path
-from urllib.parse import quote
+
+def parse_height(value):
+    """Parse --height: numeric values are pixels, anything else (e.g. "80%") is kept as-is."""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+# Optional command-line flags: flag -> (keyword argument, converter)
+OPTIONS = {
+    "--overlays": ("overlays", str),
+    "--viewer-url": ("viewer_url", str),
+    "--height": ("height", parse_height),
+}
+
+# Separates the iframes printed in --batch mode
+BATCH_SEPARATOR = "\n<!--SEP-->\n"
+
+# data-external="1" prevents Quarto from embedding the iframe as a data URL
+IFRAME_TEMPLATE = '''<iframe
+  data-external="1"
+  src="{viewer_url}?audio={encoded_path}&overlays={overlays}"
+  width="100%"
+  height="{height}"
+  frameborder="0"
+  style="border: 1px solid #ddd; border-radius: 4px;">
+</iframe>'''
 
 def calculate_relative_path(audio_path, viewer_url):
     """
@@ -33,35 +65,21 @@ def calculate_relative_path(audio_path, viewer_url):
     Returns:
         Relative path from viewer's directory to audio file
     """
-    # Parse paths
-    audio_file = Path(audio_path).resolve()
-    viewer_file = Path(viewer_url).resolve()
-    viewer_dir = viewer_file.parent
-
-    # Calculate relative path from viewer's directory to audio
-    try:
-        rel_path = audio_file.relative_to(viewer_dir)
-        return str(rel_path)
-    except ValueError:
-        # Not in same tree, need to go up
-        # Calculate relative path using standard algorithm
-        audio_parts = audio_file.parts
-        viewer_parts = viewer_dir.parts
-
-        # Find common ancestor
-        common_length = 0
-        for a, b in zip(audio_parts, viewer_parts):
-            if a == b:
-                common_length += 1
-            else:
-                break
-
-        # Build path: go up from viewer_dir, then down to audio
-        ups = len(viewer_parts) - common_length
-        downs = audio_parts[common_length:]
-
-        path_parts = ['..'] * ups + list(downs)
-        return '/'.join(path_parts)
+    import os
+
+    if (not os.path.isabs(audio_path) and not os.path.isabs(viewer_url)
+            and '..' not in audio_path and '..' not in viewer_url):
+        # Both relative to the current directory and never leaving it: anchor
+        # them at the same root so relpath works on the strings alone,
+        # without looking up the current directory
+        audio_file = os.path.join(os.sep, audio_path)
+        viewer_dir = os.path.join(os.sep, os.path.dirname(viewer_url))
+    else:
+        audio_file = os.path.abspath(audio_path)
+        viewer_dir = os.path.dirname(os.path.abspath(viewer_url))
+
+    # Relative path from the viewer's directory to the audio, with URL separators
+    return os.path.relpath(audio_file, start=viewer_dir).replace(os.sep, '/')
 
 def create_embedded_viewer(audio_path, overlays="pitch,formants", viewer_url="./ozen-web/viewer.html", height=600):
     """
@@ -76,9 +94,11 @@ def create_embedded_viewer(audio_path, overlays="pitch,formants", viewer_url="./
     Returns:
         HTML string for iframe
     """
-    audio_file = Path(audio_path)
+    # Imported here so the usage/error path doesn't pay for them
+    import os
+    from urllib.parse import quote
 
-    if not audio_file.exists():
+    if not os.path.exists(audio_path):
         raise FileNotFoundError(f"Audio file not found: {audio_path}")
 
     # Calculate relative path from viewer to audio
@@ -87,58 +107,74 @@ def create_embedded_viewer(audio_path, overlays="pitch,formants", viewer_url="./
     # URL encode the path (keep slashes for readability)
     encoded_path = quote(audio_relative, safe='/')
 
-    # Format height - convert int to string, keep strings as-is
-    height_str = str(height)
+    # Height is an int (pixels) or a string such as "80%"; format() handles both
+    return IFRAME_TEMPLATE.format(viewer_url=viewer_url, encoded_path=encoded_path,
+                                  overlays=overlays, height=height)
 
-    # Create iframe with data-external="1" to prevent Quarto from embedding it as data URL
-    iframe = f'''<iframe
-  data-external="1"
-  src="{viewer_url}?audio={encoded_path}&overlays={overlays}"
-  width="100%"
-  height="{height_str}"
-  frameborder="0"
-  style="border: 1px solid #ddd; border-radius: 4px;">
-</iframe>'''
+def create_batch(list_path, **defaults):
+    """
+    Create iframe HTML for every audio file in a tab-separated list.
 
-    return iframe
+    Args:
+        list_path: Path to the list, or "-" for stdin. Each line is
+            audio_path[<TAB>overlays[<TAB>viewer_url[<TAB>height]]]; blank lines are skipped
+        **defaults: create_embedded_viewer options used for missing or empty columns
+
+    Returns:
+        HTML for all iframes, separated by BATCH_SEPARATOR
+    """
+    if list_path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(list_path) as f:
+            lines = f.read().splitlines()
+
+    iframes = []
+    for line in lines:
+        audio_path, *columns = line.split("\t")
+        if not audio_path.strip():
+            continue
+
+        # Columns follow the order of OPTIONS
+        options = dict(defaults)
+        for (name, convert), value in zip(OPTIONS.values(), columns):
+            if value:
+                options[name] = convert(value)
+        iframes.append(create_embedded_viewer(audio_path, **options))
+
+    return BATCH_SEPARATOR.join(iframes)
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python create-iframe.py <audio-file> [--overlays pitch,formants] [--viewer-url ./ozen-web/viewer.html] [--height 600]")
+        print("       python create-iframe.py --batch <file-list> [--overlays pitch,formants] [--viewer-url ./ozen-web/viewer.html] [--height 600]")
         print("\nExamples:")
         print("  python create-iframe.py audio.wav --overlays pitch,formants,hnr --height 800")
         print("  python create-iframe.py audio.wav --overlays pitch,formants --height 80%")
         sys.exit(1)
 
-    audio_path = sys.argv[1]
-    overlays = "pitch,formants"
-    viewer_url = "./ozen-web/viewer.html"
-    height = 600
+    batch = sys.argv[1] == "--batch"
+    if batch and len(sys.argv) < 3:
+        print("--batch requires a file list", file=sys.stderr)
+        sys.exit(1)
+
+    options = {"overlays": "pitch,formants", "viewer_url": "./ozen-web/viewer.html", "height": 600}
 
     # Parse optional arguments
-    i = 2
-    while i < len(sys.argv):
-        if sys.argv[i] == "--overlays" and i + 1 < len(sys.argv):
-            overlays = sys.argv[i + 1]
-            i += 2
-        elif sys.argv[i] == "--viewer-url" and i + 1 < len(sys.argv):
-            viewer_url = sys.argv[i + 1]
-            i += 2
-        elif sys.argv[i] == "--height" and i + 1 < len(sys.argv):
-            # Height can be numeric (pixels) or string (percentage)
-            height_arg = sys.argv[i + 1]
-            # Try to convert to int if numeric, otherwise keep as string
-            try:
-                height = int(height_arg)
-            except ValueError:
-                height = height_arg
-            i += 2
-        else:
-            print(f"Unknown argument: {sys.argv[i]}", file=sys.stderr)
+    args = iter(sys.argv[3:] if batch else sys.argv[2:])
+    for arg in args:
+        name, convert = OPTIONS.get(arg, (None, None))
+        value = next(args, None)
+        if name is None or value is None:
+            print(f"Unknown argument: {arg}", file=sys.stderr)
             sys.exit(1)
+        options[name] = convert(value)
 
     try:
-        html = create_embedded_viewer(audio_path, overlays, viewer_url, height)
+        if batch:
+            html = create_batch(sys.argv[2], **options)
+        else:
+            html = create_embedded_viewer(sys.argv[1], **options)
         print(html)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
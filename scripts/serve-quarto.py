@@ -9,22 +9,71 @@ Usage:
     python serve-quarto.py [directory] [port]
 
 Default: Serves current directory on port 8000
+
+Directory listings are disabled; directories are only served via index.html.
 """
 
 import sys
-import http.server
-import socketserver
-from pathlib import Path
+
+# Audio files get explicit MIME types and a short Cache-Control, so several
+# viewer iframes on one page reuse a single download of the same file
+AUDIO_TYPES = {
+    '.wav': 'audio/wav',
+    '.mp3': 'audio/mpeg',
+    '.ogg': 'audio/ogg',
+    '.flac': 'audio/flac',
+}
+AUDIO_CACHE_CONTROL = 'public, max-age=60'
 
 def serve(directory='.', port=8000):
     """Start a simple HTTP server."""
+    import http.server
+    import socket
+    from pathlib import Path
+    from urllib.parse import urlsplit
+
     path = Path(directory).resolve()
 
     class Handler(http.server.SimpleHTTPRequestHandler):
+        extensions_map = {**http.server.SimpleHTTPRequestHandler.extensions_map, **AUDIO_TYPES}
+
         def __init__(self, *args, **kwargs):
             super().__init__(*args, directory=str(path), **kwargs)
 
-    with socketserver.TCPServer(("", port), Handler) as httpd:
+        def send_response(self, code, message=None):
+            super().send_response(code, message)
+            # Error responses are left uncached
+            if code in (200, 304) and urlsplit(self.path).path.lower().endswith(tuple(AUDIO_TYPES)):
+                self.send_header('Cache-Control', AUDIO_CACHE_CONTROL)
+
+        def copyfile(self, source, outputfile):
+            if outputfile is not self.wfile:
+                return super().copyfile(source, outputfile)
+            # Let the kernel copy file bodies (sendfile) instead of looping
+            # over 16 KiB reads; falls back to send() for non-file sources.
+            # Flush first so buffered headers go out ahead of the body.
+            self.wfile.flush()
+            self.connection.sendfile(source)
+
+        def list_directory(self, path):
+            # Only specific files are requested by documents; directories
+            # with an index.html are still served by send_head()
+            self.send_error(403, "Directory listing disabled")
+            return None
+
+    # Threaded so the parallel requests of a page (viewer, JS, CSS, audio)
+    # don't queue behind each other
+    class Server(http.server.ThreadingHTTPServer):
+        request_queue_size = 32
+        daemon_threads = True
+        allow_reuse_address = True
+
+        def server_bind(self):
+            # Larger send buffer for multi-MB audio responses
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+            super().server_bind()
+
+    with Server(("", port), Handler) as httpd:
         print(f"Serving {path} at http://localhost:{port}")
         print(f"Open your Quarto document at: http://localhost:{port}/your-document.html")
         print("Press Ctrl+C to stop")